@@ -12,10 +12,89 @@ import os
 import subprocess
 import tempfile
 import shutil
+import contextlib
+import functools
+import hashlib
+import math
+import struct
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+# Pin fields mirror ConfigLoader::loadConfig() in src/config_loader.cpp
+_UINT8_PIN = {"type": "integer", "minimum": 0, "maximum": 255}
+_OPTIONAL_PIN = {"type": "integer", "minimum": -1, "maximum": 127}  # int8_t, -1 = not fitted
+
+CONFIG_SCHEMA = {
+    "type": "object",
+    "required": ["custom_pins"],
+    "properties": {
+        "custom_pins": {
+            "type": "object",
+            "properties": {
+                "enabled": {"type": "boolean"},
+                "rssi_input": _UINT8_PIN,
+                "rx5808_data": _UINT8_PIN,
+                "rx5808_clk": _UINT8_PIN,
+                "rx5808_sel": _UINT8_PIN,
+                "mode_switch": _UINT8_PIN,
+                "power_button": _UINT8_PIN,
+                "battery_adc": _UINT8_PIN,
+                "audio_dac": _UINT8_PIN,
+                "usb_detect": _UINT8_PIN,
+                "lcd_i2c_sda": _OPTIONAL_PIN,
+                "lcd_i2c_scl": _OPTIONAL_PIN,
+                "lcd_backlight": _OPTIONAL_PIN,
+            },
+        },
+    },
+}
+
+# Compiled once at import into straight-line Python checks
+_VALIDATE = fastjsonschema.compile(CONFIG_SCHEMA) if fastjsonschema is not None else None
+
+def get_cache_dir():
+    """Per-user cache directory for the flash tool (~/.cache/starforge)"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "starforge"
+
+@functools.lru_cache(maxsize=1)
 def find_mkspiffs():
-    """Find mkspiffs executable (from PlatformIO or system)"""
+    """
+    Find mkspiffs executable (from PlatformIO or system)
+
+    The result is cached in-process and in ~/.cache/starforge/mkspiffs_path,
+    so repeated calls and later runs skip the directory scan. A cached path
+    that no longer resolves is discarded.
+    """
+    
+    cache_file = get_cache_dir() / "mkspiffs_path"
+    try:
+        cached = cache_file.read_text().strip()
+        if cached and shutil.which(cached):
+            return cached
+    except OSError:
+        pass
+    
+    mkspiffs = _search_mkspiffs()
+    if shutil.which(mkspiffs):  # Same check the read-back above applies
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            cache_file.write_text(mkspiffs)
+        except OSError:
+            pass  # Cache is best effort
+    return mkspiffs
+
+def _search_mkspiffs():
+    """Search PlatformIO, PATH and bundled locations for mkspiffs"""
     
     # Try common PlatformIO locations
     home = Path.home()
@@ -26,7 +105,7 @@ def find_mkspiffs():
     ]
     
     for pio_path in platformio_paths:
-        if pio_path.exists():
+        if pio_path.is_file():
             return str(pio_path)
         # Check for platform-specific binaries
         for exe in pio_path.glob("mkspiffs*"):
@@ -54,10 +133,145 @@ def find_mkspiffs():
         "mkspiffs not found! Please install PlatformIO or provide mkspiffs binary"
     )
 
+def _check_config(config):
+    """Plain-Python version of the CONFIG_SCHEMA rules, used without fastjsonschema"""
+    if not isinstance(config, dict):
+        return "data must be object"
+    if "custom_pins" not in config:
+        return "data must contain ['custom_pins'] properties"
+    pins = config["custom_pins"]
+    if not isinstance(pins, dict):
+        return "data.custom_pins must be object"
+    
+    for name, rule in CONFIG_SCHEMA["properties"]["custom_pins"]["properties"].items():
+        if name not in pins:
+            continue
+        value = pins[name]
+        path = f"data.custom_pins.{name}"
+        if rule["type"] == "boolean":
+            if not isinstance(value, bool):
+                return f"{path} must be boolean"
+            continue
+        # JSON Schema integers include integral floats such as 3.0
+        is_integer = isinstance(value, int) or (isinstance(value, float) and value.is_integer())
+        if not is_integer or isinstance(value, bool):
+            return f"{path} must be integer"
+        if value < rule["minimum"]:
+            return f"{path} must be bigger than or equal to {rule['minimum']}"
+        if value > rule["maximum"]:
+            return f"{path} must be smaller than or equal to {rule['maximum']}"
+    return None
+
+def validate_config(config):
+    """
+    Check a configuration dict against CONFIG_SCHEMA
+
+    Uses the compiled fastjsonschema validator when installed, otherwise the
+    equivalent plain-Python checks, so results don't depend on the environment.
+
+    Returns:
+        Error message, or None if the config is valid
+    """
+    if _VALIDATE is None:
+        return _check_config(config)
+    
+    try:
+        _VALIDATE(config)
+    except fastjsonschema.JsonSchemaValueException as e:
+        return e.message
+    return None
+
+def get_staging_dir():
+    """
+    Pick the directory for short-lived SPIFFS staging files
+
+    On Linux the files go to /dev/shm (tmpfs), so config.json is written to and
+    read back by mkspiffs from RAM with no disk I/O; this adds up in batch
+    flashing loops. An explicit TMPDIR always wins, and elsewhere (macOS
+    $TMPDIR, Windows %TEMP%) the tempfile default is used.
+
+    Returns:
+        Directory path, or None for the tempfile default
+    """
+    if os.environ.get("TMPDIR"):
+        return None
+    if sys.platform.startswith("linux") and os.access("/dev/shm", os.W_OK | os.X_OK):
+        return "/dev/shm"
+    return None
+
+_JSON_CONSTANTS = {True: "true", False: "false", None: "null"}
+
+def _is_simple_string(text):
+    """True if text can be emitted between quotes without any escaping"""
+    return text.isascii() and text.isprintable() and '"' not in text and '\\' not in text
+
+def _is_simple(obj):
+    """True if obj only holds dicts, lists, ASCII strings and finite scalars"""
+    t = type(obj)
+    if t is dict:
+        return all(type(k) is str and _is_simple_string(k) and _is_simple(v)
+                   for k, v in obj.items())
+    if t is list:
+        return all(_is_simple(v) for v in obj)
+    if t is str:
+        return _is_simple_string(obj)
+    if t is float:
+        return math.isfinite(obj)
+    return t is int or t is bool or obj is None
+
+def _dump_simple(obj, out, level=0):
+    """
+    Append indent=2 JSON for an object accepted by _is_simple() to out
+
+    Output is identical to json.dumps(obj, indent=2), minus the per-value
+    type dispatch and string escaping of the generic encoder.
+    """
+    t = type(obj)
+    if t is dict:
+        if not obj:
+            out.append("{}")
+            return
+        sep = "{\n" + "  " * (level + 1)
+        for key, value in obj.items():
+            out.append(sep + '"' + key + '": ')
+            _dump_simple(value, out, level + 1)
+            sep = ",\n" + "  " * (level + 1)
+        out.append("\n" + "  " * level + "}")
+    elif t is list:
+        if not obj:
+            out.append("[]")
+            return
+        sep = "[\n" + "  " * (level + 1)
+        for value in obj:
+            out.append(sep)
+            _dump_simple(value, out, level + 1)
+            sep = ",\n" + "  " * (level + 1)
+        out.append("\n" + "  " * level + "]")
+    elif t is str:
+        out.append('"' + obj + '"')
+    elif t is int:
+        out.append(int.__repr__(obj))
+    elif t is float:
+        out.append(float.__repr__(obj))
+    else:
+        out.append(_JSON_CONSTANTS[obj])
+
+def serialize_config(config):
+    """Serialize configuration dict to indented JSON bytes (orjson if available)"""
+    if orjson is not None:
+        return orjson.dumps(config, option=orjson.OPT_INDENT_2)
+
+    # Pin configs are plain ints/bools: validate in one pass, emit in a second
+    if _is_simple(config):
+        out = []
+        _dump_simple(config, out)
+        return "".join(out).encode('ascii')
+    return json.dumps(config, indent=2).encode('utf-8')
+
 def create_config_json(config, output_file):
     """Create config.json file from configuration dict"""
-    with open(output_file, 'w') as f:
-        json.dump(config, f, indent=2)
+    with open(output_file, 'wb') as f:
+        f.write(serialize_config(config))
     print(f"✓ Created config.json: {output_file}")
 
 def generate_spiffs_image(source_dir, output_image, block_size=4096, page_size=256, image_size=0x170000):
@@ -75,6 +289,11 @@ def generate_spiffs_image(source_dir, output_image, block_size=4096, page_size=2
     mkspiffs = find_mkspiffs()
     print(f"✓ Found mkspiffs: {mkspiffs}")
     
+    # mkspiffs writes next to the final image, which is then swapped in with
+    # os.replace(): same filesystem, so no copy, and readers never see a
+    # half-written image
+    tmp_image = f"{output_image}.tmp"
+    
     # Build mkspiffs command
     cmd = [
         mkspiffs,
@@ -82,70 +301,225 @@ def generate_spiffs_image(source_dir, output_image, block_size=4096, page_size=2
         "-b", str(block_size),       # Block size
         "-p", str(page_size),        # Page size
         "-s", hex(image_size),       # Image size
-        str(output_image)            # Output file
+        tmp_image                    # Output file
     ]
     
     print(f"✓ Running: {' '.join(cmd)}")
     
+    # Stream mkspiffs output line by line instead of buffering it all
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        if result.stdout:
-            print(result.stdout)
-        print(f"✓ SPIFFS image created: {output_image}")
-        print(f"  Size: {os.path.getsize(output_image):,} bytes")
-        return True
-    except subprocess.CalledProcessError as e:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                text=True, bufsize=1)
+    except OSError as e:
         print(f"✗ mkspiffs failed: {e}")
-        if e.stdout:
-            print(f"  stdout: {e.stdout}")
-        if e.stderr:
-            print(f"  stderr: {e.stderr}")
         return False
+    
+    with proc:
+        for line in proc.stdout:
+            print(line, end='', flush=True)
+    
+    if proc.returncode != 0:
+        print(f"✗ mkspiffs failed: exit code {proc.returncode}")
+        with contextlib.suppress(OSError):
+            os.remove(tmp_image)
+        return False
+    
+    os.replace(tmp_image, output_image)
+    print(f"✓ SPIFFS image created: {output_image}")
+    print(f"  Size: {os.path.getsize(output_image):,} bytes")
+    return True
+
+# Each cached image is a full partition (1.5MB by default); keep only the most recent
+SPIFFS_CACHE_MAX_ENTRIES = 8
+
+def _mkspiffs_fingerprint():
+    """Resolved path, size and mtime of the mkspiffs binary that builds the images"""
+    mkspiffs = find_mkspiffs()
+    path = os.path.realpath(shutil.which(mkspiffs) or mkspiffs)
+    st = os.stat(path)
+    return f"{path}\0{st.st_size}\0{st.st_mtime_ns}".encode('utf-8')
+
+def spiffs_cache_key(config_dict, block_size=4096, page_size=256, image_size=0x170000):
+    """
+    Content hash of the SPIFFS image that config_dict and this geometry produce
+
+    Hashes the exact config.json bytes that would be written, so anything that
+    changes the file (values, key order, serializer) changes the key. The
+    mkspiffs binary is part of the key too: a different build or a PlatformIO
+    upgrade can produce incompatible images.
+    """
+    payload = (serialize_config(config_dict)
+               + struct.pack('>III', block_size, page_size, image_size)
+               + _mkspiffs_fingerprint())
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def _cached_image_path(key):
+    return get_cache_dir() / "spiffs" / f"{key}.bin"
+
+def fetch_cached_image(key, output_image):
+    """Copy a previously built image to output_image; False on cache miss"""
+    cached = _cached_image_path(key)
+    tmp_image = f"{output_image}.tmp"
+    try:
+        shutil.copyfile(cached, tmp_image)
+        os.replace(tmp_image, output_image)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_image)
+        return False
+    with contextlib.suppress(OSError):
+        os.utime(cached)  # Mark as recently used for eviction
+    print(f"✓ Reused cached SPIFFS image: {cached}")
+    return True
+
+def _evict_cached_images(cache_dir):
+    """Remove the least recently used images beyond SPIFFS_CACHE_MAX_ENTRIES"""
+    entries = []
+    for path in cache_dir.glob("*.bin"):
+        with contextlib.suppress(OSError):
+            entries.append((path.stat().st_mtime, path))
+    entries.sort(reverse=True)
+    for _, path in entries[SPIFFS_CACHE_MAX_ENTRIES:]:
+        with contextlib.suppress(OSError):
+            path.unlink()
+
+def store_cached_image(key, output_image):
+    """Save a freshly built image under its content hash (best effort)"""
+    cached = _cached_image_path(key)
+    tmp = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+    try:
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(output_image, tmp)
+        os.replace(tmp, cached)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        return
+    _evict_cached_images(cached.parent)
+
+def _build_with_config(staging_dir, config_dict, output_image, block_size, page_size, image_size,
+                       use_cache=True):
+    """Cache lookup, config.json staging and mkspiffs run shared by single and batch paths"""
+    if use_cache:
+        key = spiffs_cache_key(config_dict, block_size, page_size, image_size)
+        if fetch_cached_image(key, output_image):
+            return True
+    
+    # Create config.json
+    create_config_json(config_dict, Path(staging_dir) / "config.json")
+    
+    # Generate SPIFFS image
+    if not generate_spiffs_image(staging_dir, output_image, block_size, page_size, image_size):
+        return False
+    
+    if use_cache:
+        store_cached_image(key, output_image)
+    return True
 
-def generate_spiffs_with_config(config_dict, output_image, include_web_files=False):
+def generate_spiffs_with_config(config_dict, output_image, include_web_files=False,
+                                block_size=4096, page_size=256, image_size=0x170000,
+                                use_cache=True):
     """
     Generate SPIFFS image with custom config.json
     
+    Images are cached in ~/.cache/starforge/spiffs by content hash, so
+    regenerating an unchanged config skips mkspiffs entirely. Only the
+    SPIFFS_CACHE_MAX_ENTRIES most recently used images are kept.
+    
     Args:
         config_dict: Configuration dictionary to write as config.json
         output_image: Output .bin file path
         include_web_files: If True, also include web UI files (index.html, style.css, app.js)
+        block_size: SPIFFS block size (default 4096 for ESP32)
+        page_size: SPIFFS page size (default 256 for ESP32)
+        image_size: Total SPIFFS partition size (default 0x170000 = 1.5MB)
+        use_cache: If False, always run mkspiffs and leave the image cache alone
     """
     
+    # Optionally include web files (for firmware that needs them)
+    if include_web_files:
+        print("Note: Web files not included (use existing SPIFFS or PlatformIO uploadfs)")
+    
     # Create temporary directory for SPIFFS contents
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
-        
-        # Create config.json
-        config_file = temp_path / "config.json"
-        create_config_json(config_dict, config_file)
-        
-        # Optionally include web files (for firmware that needs them)
-        if include_web_files:
-            print("Note: Web files not included (use existing SPIFFS or PlatformIO uploadfs)")
-        
-        # Generate SPIFFS image
-        return generate_spiffs_image(temp_dir, output_image)
+    with tempfile.TemporaryDirectory(dir=get_staging_dir()) as temp_dir:
+        return _build_with_config(temp_dir, config_dict, output_image,
+                                  block_size, page_size, image_size, use_cache)
+
+class SpiffsBatchGenerator:
+    """
+    Generate many SPIFFS images in-process with one reused staging directory
+
+    Saves creating and removing a staging directory per image compared with
+    calling generate_spiffs_with_config() in a loop. mkspiffs still runs once
+    per image (it has no multi-image mode); its lookup is cached either way.
+    Pass use_cache=False for per-device batches where every config differs,
+    since those never hit the image cache and would only churn it.
+
+    Usage:
+        with SpiffsBatchGenerator() as batch:
+            for config, out in jobs:
+                batch.submit(config, out)
+    """
+
+    def __init__(self, use_cache=True):
+        self._temp_dir = tempfile.TemporaryDirectory(dir=get_staging_dir())
+        self._use_cache = use_cache
+
+    def submit(self, config_dict, output_image, block_size=4096, page_size=256, image_size=0x170000):
+        """
+        Generate one SPIFFS image with custom config.json
+
+        Args:
+            config_dict: Configuration dictionary to write as config.json
+            output_image: Output .bin file path
+            block_size: SPIFFS block size (default 4096 for ESP32)
+            page_size: SPIFFS page size (default 256 for ESP32)
+            image_size: Total SPIFFS partition size (default 0x170000 = 1.5MB)
+
+        Returns:
+            True if the image was created
+        """
+        return _build_with_config(self._temp_dir.name, config_dict, output_image,
+                                  block_size, page_size, image_size, self._use_cache)
+
+    def close(self):
+        """Remove the staging directory"""
+        self._temp_dir.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+_EXAMPLE_CONFIG = {
+    "custom_pins": {
+        "enabled": True,
+        "rssi_input": 3,
+        "rx5808_data": 6,
+        "rx5808_clk": 4,
+        "rx5808_sel": 7,
+        "mode_switch": 1
+    }
+}
+
+# Serialized once at import rather than on every usage error
+_USAGE_EXAMPLE = serialize_config(_EXAMPLE_CONFIG).decode('utf-8')
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: generate_spiffs.py <config.json> <output.bin>")
+    args = sys.argv[1:]
+    use_cache = "--no-cache" not in args
+    args = [arg for arg in args if arg != "--no-cache"]
+    
+    if len(args) < 2:
+        print("Usage: generate_spiffs.py [--no-cache] <config.json> <output.bin>")
         print("")
         print("Example config.json:")
-        print(json.dumps({
-            "custom_pins": {
-                "enabled": True,
-                "rssi_input": 3,
-                "rx5808_data": 6,
-                "rx5808_clk": 4,
-                "rx5808_sel": 7,
-                "mode_switch": 1
-            }
-        }, indent=2))
+        print(_USAGE_EXAMPLE)
         sys.exit(1)
     
-    config_json_path = sys.argv[1]
-    output_bin_path = sys.argv[2]
+    config_json_path = args[0]
+    output_bin_path = args[1]
     
     # Load configuration
     try:
@@ -156,8 +530,9 @@ def main():
         sys.exit(1)
     
     # Validate config
-    if "custom_pins" not in config:
-        print("✗ Missing 'custom_pins' section in config")
+    error = validate_config(config)
+    if error:
+        print(f"✗ Invalid config: {error}")
         sys.exit(1)
     
     # Generate SPIFFS image
@@ -165,7 +540,7 @@ def main():
     print(f"Config: {config_json_path}")
     print(f"Output: {output_bin_path}\n")
     
-    success = generate_spiffs_with_config(config, output_bin_path)
+    success = generate_spiffs_with_config(config, output_bin_path, use_cache=use_cache)
     
     if success:
         print(f"\n✓ Done! Flash with:")
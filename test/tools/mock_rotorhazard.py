@@ -30,6 +30,62 @@ WRITE_EXIT_AT_LEVEL = 0x72
 
 NODE_API_LEVEL = 35
 
+# Single-byte frames for every command code, built once
+_CMD_BYTES = {c: bytes([c]) for c in range(256)}
+
+# Big-endian uint16 (frequency payloads)
+_U16BE = struct.Struct('>H')
+
+
+def checksum(data: bytes) -> int:
+    """RotorHazard checksum: 8-bit sum of the payload bytes"""
+    return sum(data) & 0xFF
+
+
+def _cstr(data: bytes) -> str:
+    """Decode a NUL-padded firmware string"""
+    return data.partition(b'\x00')[0].decode('ascii', errors='ignore')
+
+
+def _payload(reply: bytes) -> bytes:
+    """Strip and verify the checksum byte that ends every read reply"""
+    payload, received = reply[:-1], reply[-1]
+    expected = checksum(payload)
+    if received != expected:
+        raise ValueError(f"Checksum mismatch: got 0x{received:02X}, expected 0x{expected:02X}")
+    return payload
+
+
+# Read-only queries. Each entry: (command, reply length, parser -> (ok, value), label).
+# Reply lengths follow Message::handleReadCommand() in node_mode.cpp and include
+# the trailing checksum byte; parsers receive the payload without it.
+_API_LEVEL_READS = [
+    (READ_REVISION_CODE, 3,
+     lambda d: (d[0] == 0x25 and d[1] == NODE_API_LEVEL, d[1]), "API Level"),
+]
+_FIRMWARE_READS = [
+    (READ_FW_VERSION, 17, lambda d: (True, _cstr(d)), "Firmware Version"),
+    (READ_FW_BUILDDATE, 17, lambda d: (True, _cstr(d)), "Build Date"),
+    (READ_FW_PROCTYPE, 17, lambda d: (True, _cstr(d)), "Processor"),
+]
+_FREQUENCY_READS = [
+    (READ_FREQUENCY, 3, lambda d: (True, _U16BE.unpack(d)[0]), "Read Frequency"),
+]
+_THRESHOLD_READS = [
+    (READ_ENTER_AT_LEVEL, 2, lambda d: (True, d[0]), "Enter Threshold"),
+    (READ_EXIT_AT_LEVEL, 2, lambda d: (True, d[0]), "Exit Threshold"),
+]
+_RSSI_READS = [
+    (READ_NODE_RSSI_PEAK, 2, lambda d: (True, d[0]), "RSSI Reading"),
+]
+
+# Full READ_REVISION_CODE reply from a ready node, used as the boot probe
+_REVISION_REPLY = bytes([0x25, NODE_API_LEVEL, checksum(bytes([0x25, NODE_API_LEVEL]))])
+
+# None of these depend on each other or on prior writes, so they can share one round trip
+_READ_SCHEDULE = (_API_LEVEL_READS + _FIRMWARE_READS + _FREQUENCY_READS
+                  + _THRESHOLD_READS + _RSSI_READS)
+
 
 @dataclass
 class NodeState:
@@ -47,8 +103,23 @@ class MockRotorHazardServer:
         self.timeout = timeout
         self.ser = None
         self.state = NodeState()
-        self.test_results = []
+        # Test results stored column-wise; see _record() / test_results
+        self._names = []
+        self._ok = bytearray()
+        self._values = []
         
+    def _record(self, name: str, ok: bool, value):
+        """Record one test result"""
+        self._names.append(name)
+        self._ok.append(ok)
+        self._values.append(value)
+    
+    @property
+    def test_results(self) -> list:
+        """Recorded results as (name, success, value) tuples"""
+        return [(name, bool(ok), value)
+                for name, ok, value in zip(self._names, self._ok, self._values)]
+    
     def connect(self):
         """Connect to the node via serial"""
         try:
@@ -57,32 +128,68 @@ class MockRotorHazardServer:
                 self.baudrate,
                 timeout=self.timeout
             )
-            time.sleep(2)  # Wait for ESP32 to boot
+            if hasattr(self.ser, 'set_buffer_size'):
+                # Windows only: enlarge the driver RX queue (POSIX uses termios defaults)
+                self.ser.set_buffer_size(rx_size=65536)
+            if not self._wait_until_ready():
+                print("⚠ Node did not answer READ_REVISION_CODE during boot wait, continuing anyway")
             print(f"✓ Connected to {self.port} at {self.baudrate} baud")
             return True
         except Exception as e:
             print(f"✗ Failed to connect: {e}")
             return False
     
+    def _wait_until_ready(self, boot_timeout: float = 2.0) -> bool:
+        """Probe READ_REVISION_CODE until the node answers 0x25 + NODE_API_LEVEL (ESP32 boot wait)"""
+        deadline = time.monotonic() + boot_timeout
+        self.ser.timeout = 0.05
+        try:
+            # setup() prints boot text around the replies, so drain everything
+            # that arrives and search it rather than expecting aligned replies
+            received = bytearray()
+            next_probe = 0.0
+            ready = False
+            while time.monotonic() < deadline:
+                if time.monotonic() >= next_probe:
+                    self.send_command(READ_REVISION_CODE)
+                    next_probe = time.monotonic() + 0.1
+                received += self.ser.read(max(1, self.ser.in_waiting))
+                if _REVISION_REPLY in received:
+                    ready = True
+                    break
+                del received[:-(len(_REVISION_REPLY) - 1)]  # Keep a possible partial reply
+            
+            # Replies to probes the node queued while booting can still be in
+            # flight; wait (bounded) for the line to go quiet before discarding them
+            quiet_deadline = time.monotonic() + 0.5
+            while self.ser.read(64) and time.monotonic() < quiet_deadline:
+                pass
+            return ready
+        finally:
+            self.ser.timeout = self.timeout
+            self.ser.reset_input_buffer()
+    
     def disconnect(self):
         """Close serial connection"""
         if self.ser:
             self.ser.close()
             print("✓ Disconnected")
     
-    def send_command(self, command: int):
-        """Send a read command to the node"""
-        self.ser.write(bytes([command]))
+    def send_command(self, *commands: int):
+        """Send one or more read commands to the node in a single write"""
+        self.ser.write(_CMD_BYTES[commands[0]] if len(commands) == 1 else bytes(commands))
         self.ser.flush()
     
     def send_write_command(self, command: int, data: bytes):
         """Send a write command with data and checksum"""
-        message = bytes([command]) + data
-        checksum = sum(data) & 0xFF
-        message += bytes([checksum])
+        message = _CMD_BYTES[command] + data + _CMD_BYTES[checksum(data)]
         self.ser.write(message)
         self.ser.flush()
     
+    def send_write_u16(self, command: int, value: int):
+        """Send a write command with a big-endian uint16 payload (e.g. WRITE_FREQUENCY)"""
+        self.send_write_command(command, _U16BE.pack(value))
+    
     def read_response(self, expected_bytes: int) -> bytes:
         """Read response from node"""
         data = self.ser.read(expected_bytes)
@@ -90,136 +197,96 @@ class MockRotorHazardServer:
             raise TimeoutError(f"Expected {expected_bytes} bytes, got {len(data)}")
         return data
     
-    def test_read_api_level(self) -> bool:
-        """Test: Read API level (READ_ADDRESS command)"""
-        print("\n[TEST] Reading API Level...")
+    def read_replies(self, schedule) -> list:
+        """
+        Send every command in schedule with one write and return the raw replies
+        
+        Relies on node_mode.cpp servicing commands in arrival order -
+        handleSerialInput() replies to each read command before taking the
+        next byte off the RX queue - so the replies can be sliced back apart.
+        """
+        self.send_command(*(cmd for cmd, _, _, _ in schedule))
+        blob = self.read_response(sum(size for _, size, _, _ in schedule))
+        
+        replies = []
+        offset = 0
+        for _, size, _, _ in schedule:
+            replies.append(blob[offset:offset + size])
+            offset += size
+        return replies
+    
+    def _run_reads(self, title: str, schedule) -> bool:
+        """Run the queries in schedule as one test and record a result per query"""
+        print(f"\n[TEST] {title}...")
         try:
-            self.send_command(READ_ADDRESS)
-            data = self.read_response(1)
-            api_level = data[0]
-            
-            if api_level == NODE_API_LEVEL:
-                print(f"  ✓ API Level: {api_level} (expected {NODE_API_LEVEL})")
-                self.test_results.append(("API Level", True, api_level))
-                return True
-            else:
-                print(f"  ✗ API Level: {api_level} (expected {NODE_API_LEVEL})")
-                self.test_results.append(("API Level", False, api_level))
-                return False
+            replies = self.read_replies(schedule)
         except Exception as e:
             print(f"  ✗ Error: {e}")
-            self.test_results.append(("API Level", False, str(e)))
+            for _, _, _, label in schedule:
+                self._record(label, False, str(e))
             return False
+        
+        all_ok = True
+        for (_, _, parse, label), reply in zip(schedule, replies):
+            try:
+                ok, value = parse(_payload(reply))
+            except ValueError as e:
+                ok, value = False, str(e)
+            print(f"  {'✓' if ok else '✗'} {label}: {value}")
+            self._record(label, ok, value)
+            all_ok = all_ok and ok
+        return all_ok
+    
+    def test_read_api_level(self) -> bool:
+        """Test: Read API level (READ_REVISION_CODE command)"""
+        return self._run_reads("Reading API Level", _API_LEVEL_READS)
     
     def test_read_frequency(self) -> bool:
         """Test: Read current frequency"""
-        print("\n[TEST] Reading Frequency...")
-        try:
-            self.send_command(READ_FREQUENCY)
-            data = self.read_response(2)
-            freq = struct.unpack('>H', data)[0]  # Big-endian uint16
-            
-            print(f"  ✓ Frequency: {freq} MHz")
-            self.test_results.append(("Read Frequency", True, freq))
-            return True
-        except Exception as e:
-            print(f"  ✗ Error: {e}")
-            self.test_results.append(("Read Frequency", False, str(e)))
-            return False
+        return self._run_reads("Reading Frequency", _FREQUENCY_READS)
     
     def test_write_frequency(self, new_freq: int) -> bool:
         """Test: Write new frequency"""
         print(f"\n[TEST] Writing Frequency ({new_freq} MHz)...")
         try:
             # Send write frequency command
-            data = struct.pack('>H', new_freq)  # Big-endian uint16
-            self.send_write_command(WRITE_FREQUENCY, data)
+            self.send_write_u16(WRITE_FREQUENCY, new_freq)
             
             time.sleep(0.2)  # Wait for write to complete
             
             # Read back to verify
-            self.send_command(READ_FREQUENCY)
-            response = self.read_response(2)
-            read_freq = struct.unpack('>H', response)[0]
+            reply, = self.read_replies(_FREQUENCY_READS)
+            read_freq = _U16BE.unpack(_payload(reply))[0]
             
             if read_freq == new_freq:
                 print(f"  ✓ Frequency set to: {read_freq} MHz")
                 self.state.frequency = new_freq
-                self.test_results.append(("Write Frequency", True, read_freq))
+                self._record("Write Frequency", True, read_freq)
                 return True
             else:
                 print(f"  ✗ Frequency mismatch: {read_freq} (expected {new_freq})")
-                self.test_results.append(("Write Frequency", False, read_freq))
+                self._record("Write Frequency", False, read_freq)
                 return False
         except Exception as e:
             print(f"  ✗ Error: {e}")
-            self.test_results.append(("Write Frequency", False, str(e)))
+            self._record("Write Frequency", False, str(e))
             return False
     
     def test_read_threshold(self) -> bool:
         """Test: Read enter/exit thresholds"""
-        print("\n[TEST] Reading Thresholds...")
-        try:
-            self.send_command(READ_ENTER_AT_LEVEL)
-            enter_data = self.read_response(1)
-            enter_level = enter_data[0]
-            
-            self.send_command(READ_EXIT_AT_LEVEL)
-            exit_data = self.read_response(1)
-            exit_level = exit_data[0]
-            
-            print(f"  ✓ Enter at: {enter_level}, Exit at: {exit_level}")
-            self.test_results.append(("Read Thresholds", True, (enter_level, exit_level)))
-            return True
-        except Exception as e:
-            print(f"  ✗ Error: {e}")
-            self.test_results.append(("Read Thresholds", False, str(e)))
-            return False
+        return self._run_reads("Reading Thresholds", _THRESHOLD_READS)
     
     def test_firmware_info(self) -> bool:
         """Test: Read firmware version strings"""
-        print("\n[TEST] Reading Firmware Info...")
-        try:
-            # Read FW version
-            self.send_command(READ_FW_VERSION)
-            version_data = self.read_response(32)
-            version = version_data.split(b'\x00')[0].decode('ascii', errors='ignore')
-            
-            # Read build date
-            self.send_command(READ_FW_BUILDDATE)
-            date_data = self.read_response(32)
-            build_date = date_data.split(b'\x00')[0].decode('ascii', errors='ignore')
-            
-            # Read processor type
-            self.send_command(READ_FW_PROCTYPE)
-            proc_data = self.read_response(16)
-            proc_type = proc_data.split(b'\x00')[0].decode('ascii', errors='ignore')
-            
-            print(f"  ✓ Version: {version}")
-            print(f"  ✓ Build Date: {build_date}")
-            print(f"  ✓ Processor: {proc_type}")
-            self.test_results.append(("Firmware Info", True, version))
-            return True
-        except Exception as e:
-            print(f"  ✗ Error: {e}")
-            self.test_results.append(("Firmware Info", False, str(e)))
-            return False
+        return self._run_reads("Reading Firmware Info", _FIRMWARE_READS)
     
     def test_rssi_reading(self) -> bool:
         """Test: Read RSSI peak"""
-        print("\n[TEST] Reading RSSI...")
-        try:
-            self.send_command(READ_NODE_RSSI_PEAK)
-            data = self.read_response(1)
-            rssi = data[0]
-            
-            print(f"  ✓ RSSI Peak: {rssi}")
-            self.test_results.append(("RSSI Reading", True, rssi))
-            return True
-        except Exception as e:
-            print(f"  ✗ Error: {e}")
-            self.test_results.append(("RSSI Reading", False, str(e)))
-            return False
+        return self._run_reads("Reading RSSI", _RSSI_READS)
+    
+    def test_batched_reads(self) -> bool:
+        """Test: Issue every _READ_SCHEDULE query in one write and one read"""
+        return self._run_reads(f"Batched Reads ({len(_READ_SCHEDULE)} queries)", _READ_SCHEDULE)
     
     def run_all_tests(self) -> bool:
         """Run complete test suite"""
@@ -228,34 +295,25 @@ class MockRotorHazardServer:
         print("=" * 60)
         
         tests = [
-            self.test_read_api_level,
-            self.test_firmware_info,
-            self.test_read_frequency,
-            self.test_write_frequency(5740),  # Test write
-            self.test_write_frequency(5800),  # Write back
-            self.test_read_threshold,
-            self.test_rssi_reading,
+            self.test_batched_reads,
+            lambda: self.test_write_frequency(5740),  # Test write
+            lambda: self.test_write_frequency(5800),  # Write back
         ]
         
-        passed = 0
-        failed = 0
+        crashed = 0
         
         for test in tests:
             try:
-                if callable(test):
-                    result = test()
-                else:
-                    result = test
-                if result:
-                    passed += 1
-                else:
-                    failed += 1
+                test()
             except Exception as e:
                 print(f"  ✗ Test crashed: {e}")
-                failed += 1
+                crashed += 1
             
             time.sleep(0.1)  # Small delay between tests
         
+        passed = sum(self._ok)
+        failed = len(self._ok) - passed + crashed
+        
         # Print summary
         print("\n" + "=" * 60)
         print("Test Summary")